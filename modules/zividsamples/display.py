@@ -3,6 +3,7 @@ Display relevant data for Zivid Samples.
 
 """
 
+import time
 from typing import List, Optional, Tuple
 
 import cv2
@@ -151,6 +152,80 @@ def display_pointcloud(xyz: np.ndarray, rgb: np.ndarray, normals: Optional[np.nd
     # DOCTAG-END-VISUALIZE-POINT-CLOUD
 
 
+def show_pointcloud_open3d(
+    xyz: np.ndarray,
+    rgb: np.ndarray,
+    vis: Optional[o3d.visualization.Visualizer] = None,
+    pcd: Optional[o3d.geometry.PointCloud] = None,
+    block: bool = False,
+) -> Tuple[Optional[o3d.visualization.Visualizer], Optional[o3d.geometry.PointCloud]]:
+    """Show point cloud, reusing the window and Open3D point cloud from a previous call.
+
+    Pass the returned visualizer and point cloud back in to update the same window. Call vis.run() on the
+    returned visualizer to keep the window open until the user closes it.
+
+    Args:
+        xyz: A numpy array of X, Y and Z point cloud coordinates (N, 3)
+        rgb: A numpy array of RGB colors (N, 3)
+        vis: Visualizer returned by a previous call, None to open a new window
+        pcd: Open3D point cloud returned by a previous call, None to open a new window
+        block: Wait until the user presses N (the window stays open for the next call) or closes the window
+
+    Returns:
+        Visualizer and Open3D point cloud to pass to the next call, both None if the user closed the window
+
+    """
+    colors = rgb / 255.0
+    if pcd is None:
+        pcd = o3d.geometry.PointCloud()
+        pcd.points = o3d.utility.Vector3dVector(xyz)
+        pcd.colors = o3d.utility.Vector3dVector(colors)
+        vis = o3d.visualization.VisualizerWithKeyCallback()  # pylint: disable=no-member
+        vis.create_window(window_name="Stitching", width=1920, height=1080)
+        vis.add_geometry(pcd)
+        vis.get_render_option().background_color = [0.1, 0.1, 0.1]
+    else:
+        assert vis is not None
+        pcd.points = o3d.utility.Vector3dVector(xyz)
+        pcd.colors = o3d.utility.Vector3dVector(colors)
+        vis.update_geometry(pcd)
+    vis.poll_events()
+    vis.update_renderer()
+    if block and not _wait_for_next_or_close(vis):
+        vis.destroy_window()
+        return None, None
+    return vis, pcd
+
+
+def _wait_for_next_or_close(vis: o3d.visualization.VisualizerWithKeyCallback) -> bool:
+    """Keep rendering until the user presses N or closes the window.
+
+    Unlike vis.run(), pressing N keeps the window open so it can be updated with the next point cloud.
+
+    Args:
+        vis: Visualizer to render
+
+    Returns:
+        True if N was pressed, False if the window was closed
+
+    """
+    next_pressed = False
+
+    def _on_next(_vis: o3d.visualization.Visualizer) -> bool:
+        nonlocal next_pressed
+        next_pressed = True
+        return False
+
+    vis.register_key_callback(ord("N"), _on_next)
+    print("Press N in the Open3D window to continue")
+    while not next_pressed:
+        if not vis.poll_events():
+            return False
+        vis.update_renderer()
+        time.sleep(0.01)
+    return True
+
+
 # DOCTAG-START-VISUALIZE-NORMALS-IMPLEMENTATION
 def display_pointcloud_with_downsampled_normals(
     point_cloud: PointCloud,
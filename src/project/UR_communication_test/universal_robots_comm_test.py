@@ -10,7 +10,12 @@ The entire sample consist of two additional files:
 
 import zivid # :) 
 import argparse
+import ctypes
 import datetime
+import math
+import os
+import sys
+import threading
 import time
 from pathlib import Path
 from typing import List, Tuple
@@ -24,6 +29,20 @@ from scipy.spatial.transform import Rotation
 
 IP_ROBOT = "192.168.56.101"  # Replace with your robot's IP address
 SAVE_DIR = Path("dataset")  # Replace with your desired save directory
+LOG_FILE = Path("ur_rtde_joint_log.csv")
+
+RTDE_FREQUENCY = 200  # Hz, rate of the RTDE output recipe
+PLOT_RATE = 20  # Hz, rate of the joint plot redraw
+JOINT_LIMITS_DEG = (-360.0, 360.0)  # fixed y-limits, UR joints are within +-360 degrees
+PLOT_WINDOW = 30.0  # seconds of data visible in the joint plot
+LOG_CAPACITY = RTDE_FREQUENCY * 60 * 30  # samples kept in the log ring buffer (30 min)
+RAD2DEG = 180.0 / math.pi
+# core the RTDE receive thread is pinned to, the last one the process is allowed to run on (taskset, cgroups)
+RTDE_CPU_CORE = max(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1) - 1
+LOG_COLUMNS = ['time', 'loop_count'] + [f'joint_{i+1}' for i in range(6)]
+LOG_WRITE_BATCH = 4096  # samples appended to the CSV file per write
+LOG_WRITE_INTERVAL = 1.0  # seconds between checks of the CSV writer thread
+RTDE_RECEIVE_TIMEOUT = 5.0  # seconds without a package before the RTDE link is treated as lost
 
 def _write_robot_state(
     con: rtde.RTDE,
@@ -91,7 +110,7 @@ def _initialize_robot_sync(host: str) -> Tuple[rtde.RTDE, rtde.serialize.DataObj
     if not con.negotiate_protocol_version():
         raise RuntimeError("Protocol do not match")
 
-    if not con.send_output_setup(output_names, output_types, frequency=200):
+    if not con.send_output_setup(output_names, output_types, frequency=RTDE_FREQUENCY):
         raise RuntimeError("Unable to configure output")
 
     robot_input_data = con.send_input_setup(input_names, input_types)
@@ -146,6 +165,185 @@ def _ready_for_test(robot_state) -> bool:
     return robot_state.output_bit_register_64
 
 
+def _latest_samples(buffer: np.ndarray, head: int, count: int) -> np.ndarray:
+    """Get the latest samples of a ring buffer in chronological order.
+
+    Args:
+        buffer: Ring buffer with one sample per row
+        head: Total number of samples written to the buffer
+        count: Maximum number of samples to return
+
+    Returns:
+        samples: The latest min(count, head, capacity) rows, oldest first
+
+    """
+    capacity = buffer.shape[0]
+    count = min(count, head, capacity)
+    start = (head - count) % capacity
+    end = head % capacity
+    if start < end or count == 0:
+        return buffer[start:end]
+    # The requested samples wrap around the end of the buffer
+    return np.concatenate((buffer[start:], buffer[:end]))
+
+
+class _JointLog:
+    """Ring buffer of joint samples shared between the RTDE receive thread and the plot.
+
+    Each row holds one sample: time, loop count and the 6 joint positions in degrees.
+    Only the receive thread writes, head is advanced after the row is complete.
+
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.buffer = np.empty((capacity, len(LOG_COLUMNS)), dtype=np.float64)
+        self.head = 0
+
+    def latest(self, count: int) -> np.ndarray:
+        """Get the latest samples in chronological order.
+
+        Args:
+            count: Maximum number of samples to return
+
+        Returns:
+            samples: The latest samples, oldest first
+
+        """
+        return _latest_samples(self.buffer, self.head, count)
+
+
+def _pin_current_thread(core: int) -> None:
+    """Pin the calling thread to a single CPU core.
+
+    Only Linux and Windows are supported, on other platforms the thread is left as is.
+    If the core cannot be used, the thread keeps running unpinned.
+
+    Args:
+        core: Index of the CPU core
+
+    """
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            # pid 0 is the calling thread on Linux
+            os.sched_setaffinity(0, {core})
+        except OSError as error:
+            print(f"Could not pin the RTDE thread to CPU core {core}, running unpinned: {error}")
+    elif sys.platform == "win32":
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentThread.restype = ctypes.c_void_p
+        kernel32.SetThreadAffinityMask.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        kernel32.SetThreadAffinityMask.restype = ctypes.c_size_t
+        # Returns 0 on failure, the thread then keeps its previous affinity
+        if not kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), 1 << core):
+            print(f"Could not pin the RTDE thread to CPU core {core}, running unpinned")
+
+
+def _receive_joint_states(con: rtde.RTDE, joint_log: _JointLog, stop_event: threading.Event) -> None:
+    """Busy-poll the RTDE connection and store every received joint sample.
+
+    Runs in its own thread pinned to RTDE_CPU_CORE. receive_buffered polls the socket with a
+    zero timeout, so the thread never sleeps in a blocking read and no package is dropped.
+    Returns when the robot reports loop count -1, when stop_event is set, or when the connection
+    is lost or silent for RTDE_RECEIVE_TIMEOUT seconds.
+
+    Args:
+        con: Connection between computer and robot
+        joint_log: Ring buffer the samples are written to
+        stop_event: Event that stops the thread when set
+
+    """
+    _pin_current_thread(RTDE_CPU_CORE)
+    capacity = joint_log.buffer.shape[0]
+    start_time = time.time()
+    last_package_time = start_time
+    while not stop_event.is_set():
+        robot_state = con.receive_buffered()
+        if robot_state is None:
+            # receive_buffered also returns None once the connection is gone, so check both cases
+            if not con.is_connected():
+                print("RTDE connection lost")
+                break
+            if time.time() - last_package_time > RTDE_RECEIVE_TIMEOUT:
+                print(f"No RTDE package received for {RTDE_RECEIVE_TIMEOUT} seconds")
+                break
+            continue
+
+        last_package_time = time.time()
+        elapsed = last_package_time - start_time
+        loop_count = _loop_count(robot_state)
+
+        # Save log data (time, loop count and joint positions)
+        row = joint_log.buffer[joint_log.head % capacity]
+        row[0] = elapsed
+        row[1] = loop_count
+        np.multiply(robot_state.actual_q, RAD2DEG, out=row[2:])  # Use degrees instead of radians
+        joint_log.head += 1
+
+        if loop_count == -1:
+            break
+
+
+def _save_joint_log(samples: np.ndarray, path: Path, append: bool = False) -> None:
+    """Save joint samples to a CSV file.
+
+    The DataFrame is built once from the contiguous sample array, not row by row.
+
+    Args:
+        samples: Array with one sample per row, columns as in LOG_COLUMNS
+        path: Path to the CSV file
+        append: Append rows to an existing file instead of writing a new file with header
+
+    """
+    df = pd.DataFrame(samples, columns=LOG_COLUMNS, copy=False)
+    df['loop_count'] = df['loop_count'].astype(int)
+    df.to_csv(path, mode='a' if append else 'w', header=not append, index=False)
+
+
+def _write_joint_log(joint_log: _JointLog, path: Path, done_event: threading.Event) -> None:
+    """Append the samples of the joint log to a CSV file in batches.
+
+    Runs in its own thread so that file writes never block the RTDE receive thread. Full batches of
+    LOG_WRITE_BATCH samples are written as they become available, the rest once done_event is set.
+
+    Args:
+        joint_log: Ring buffer filled by the RTDE receive thread
+        path: Path to the CSV file
+        done_event: Event that is set when no more samples will be received
+
+    """
+    capacity = joint_log.buffer.shape[0]
+    _save_joint_log(joint_log.buffer[:0], path)
+    written = 0
+    while True:
+        done = done_event.wait(LOG_WRITE_INTERVAL)
+        head = joint_log.head
+        if head - written > capacity:
+            print(f"CSV writer fell behind, {head - written - capacity} samples are lost.")
+            written = head - capacity
+        while head - written >= LOG_WRITE_BATCH or (done and head > written):
+            count = min(head - written, LOG_WRITE_BATCH)
+            _save_joint_log(_latest_samples(joint_log.buffer, written + count, count), path, append=True)
+            written += count
+        if done:
+            return
+
+
+def _blit_plot(fig: plt.Figure, background, artists: List[plt.Artist]) -> None:
+    """Redraw only the animated artists on top of the cached figure background.
+
+    Args:
+        fig: Figure holding the joint plots
+        background: Figure background captured with copy_from_bbox
+        artists: Animated artists (lines and text) to draw
+
+    """
+    fig.canvas.restore_region(background)
+    for artist in artists:
+        fig.draw_artist(artist)
+    fig.canvas.blit(fig.bbox)
+    fig.canvas.flush_events()
+
+
 def _comm_test(con: rtde.RTDE, input_data: rtde.serialize.DataObject) -> None:
     """Generate dataset based on predefined robot poses.
 
@@ -177,81 +375,97 @@ def _comm_test(con: rtde.RTDE, input_data: rtde.serialize.DataObject) -> None:
     print("______________________________________________________________________\n\n")
     
     # Plt setup
+    # Lines and text are animated, they are blitted on top of a cached background
+    # so that the RTDE loop does not pay for a full redraw of the figure.
     plt.ion()
     fig, axs = plt.subplots(6, 1, figsize=(12, 10), sharex=True)
     lines = []
 
     for i in range(6):
         axs[i].set_ylabel(f'Joint {i+1}')
+        axs[i].set_ylim(*JOINT_LIMITS_DEG)
         axs[i].grid(True)
-        line, = axs[i].plot([], [], label=f'Joint {i+1}')
+        line, = axs[i].plot([], [], label=f'Joint {i+1}', animated=True)
         lines.append(line)
 
     axs[-1].set_xlabel('Time (s)')
+    axs[-1].set_xlim(0, PLOT_WINDOW)
     plt.tight_layout()
 
     # Add text for loop count
     loop_count_text = fig.text(0.95, 0.95, f'Loop Count: {_loop_count(robot_state)}', 
                               ha='right', va='top', fontsize=10, 
-                              bbox=dict(facecolor='white', alpha=0.8))
-
-    log_data = []
-    timestamps = []
-    joint_data = [[] for _ in range(6)]
-
+                              bbox=dict(facecolor='white', alpha=0.8), animated=True)
+    animated_artists = lines + [loop_count_text]
+
+    plt.show(block=False)
+    fig.canvas.draw()
+    background = fig.canvas.copy_from_bbox(fig.bbox)
+    plot_window_samples = int(PLOT_WINDOW * RTDE_FREQUENCY)
+
+    # The RTDE receive thread fills the log, this thread only plots it
+    joint_log = _JointLog(LOG_CAPACITY)
+    stop_event = threading.Event()
+    receiver = threading.Thread(target=_receive_joint_states, args=(con, joint_log, stop_event), daemon=True)
+    # The CSV file is written in batches by a third thread while the test runs
+    receiver_done = threading.Event()
+    writer = threading.Thread(target=_write_joint_log, args=(joint_log, LOG_FILE, receiver_done), daemon=True)
+
+    # The hotkey callback runs in the keyboard listener thread, the loops only check the event
+    stop_hotkey = keyboard.add_hotkey('s', stop_event.set)
     print("if you want to stop, press 's' key.")
 
-    try:
-        # main loop
-        start_time = time.time()
-        while _loop_count(robot_state) != -1:
-            # Read robot state
-            robot_state = _read_robot_state(con)
-
+    def _update_plot() -> None:
+        """Timer callback, blit the latest samples and leave the GUI event loop when the test ends."""
+        nonlocal background
+        recent = joint_log.latest(plot_window_samples)
+        if len(recent):
+            elapsed = recent[-1, 0]
+            if elapsed > axs[-1].get_xlim()[1]:
+                # Scroll the time axis, the static background has to be redrawn once
+                axs[-1].set_xlim(elapsed - PLOT_WINDOW / 2, elapsed + PLOT_WINDOW / 2)
+                fig.canvas.draw()
+                background = fig.canvas.copy_from_bbox(fig.bbox)
+            for i in range(6):
+                lines[i].set_data(recent[:, 0], recent[:, 2 + i])
             # Update loop count text
-            loop_count_text.set_text(f'Loop Count: {_loop_count(robot_state)}')
+            loop_count_text.set_text(f'Loop Count: {int(recent[-1, 1])}')
+        _blit_plot(fig, background, animated_artists)
 
-            now = time.time()
-            elapsed = now - start_time
+        # Stop key pressed or robot finished the test
+        if stop_event.is_set() or not receiver.is_alive():
+            fig.canvas.stop_event_loop()
 
-            actual_q = robot_state.actual_q
-            actual_q_deg = np.rad2deg(actual_q)  # Convert radians to degrees
-            actual_TCP_pose = robot_state.actual_TCP_pose
-            timestamps.append(elapsed)
+    # Redraws are scheduled by a GUI timer, nothing throttles the RTDE receive thread
+    plot_timer = fig.canvas.new_timer(interval=1000 // PLOT_RATE)
+    plot_timer.add_callback(_update_plot)
 
-            # Save data each Axis : Actual joint position
-            for i in range(6):
-                joint_data[i].append(actual_q_deg[i])  # Use degrees instead of radians
-
-            # Update plot
-            for i in range(6):
-                lines[i].set_data(timestamps, joint_data[i])
-                axs[i].relim()
-                axs[i].autoscale_view()
-
-            plt.pause(0.01)
-            # Save log data (time and joint positions)
-            log_entry = {
-                'time': elapsed,
-                'loop_count': _loop_count(robot_state)  # Add loop count to log data
-            }
-            for i in range(6):
-                log_entry[f'joint_{i+1}'] = actual_q_deg[i]  # Use degrees instead of radians
-            log_data.append(log_entry)
-
-            # if press 's' key, stop data collection
-            if keyboard.is_pressed('s'):
-                print("Sending signal to robot to stop data collection...")
-                # 예시: 디지털 출력 0번을 HIGH로 설정
-                _write_robot_state(con, input_data, finish_test=True, ready_to_record=False)
-                break
+    receiver.start()
+    writer.start()
+    try:
+        # main loop, runs GUI events until _update_plot stops it
+        plot_timer.start()
+        fig.canvas.start_event_loop(0)
+
+        # if press 's' key, stop data collection
+        if stop_event.is_set():
+            receiver.join()
+            print("Sending signal to robot to stop data collection...")
+            # 예시: 디지털 출력 0번을 HIGH로 설정
+            _write_robot_state(con, input_data, finish_test=True, ready_to_record=False)
     
     except KeyboardInterrupt:
         print("Ctrl+C pressed. Stopping data collection...")
 
-    df = pd.DataFrame(log_data)
-    df.to_csv("ur_rtde_joint_log.csv", index=False)
-    print("CSV file saved : ur_rtde_joint_log.csv")
+    plot_timer.stop()
+    keyboard.remove_hotkey(stop_hotkey)
+    stop_event.set()
+    receiver.join()
+    receiver_done.set()
+    writer.join()
+    print(f"CSV file saved : {LOG_FILE}")
+
+    samples = joint_log.latest(LOG_CAPACITY)
     
     _write_robot_state(con, input_data, finish_test=False, ready_to_record=False)
     
@@ -260,6 +474,14 @@ def _comm_test(con: rtde.RTDE, input_data: rtde.serialize.DataObject) -> None:
     con.send_pause()
     con.disconnect()
 
+    # Show the whole recording in a regular (non-blitted) figure
+    for i in range(6):
+        lines[i].set_data(samples[:, 0], samples[:, 2 + i])
+    for artist in animated_artists:
+        artist.set_animated(False)
+    if len(samples):
+        axs[-1].set_xlim(samples[0, 0], max(samples[-1, 0], samples[0, 0] + 1e-3))
+    plt.ioff()
     plt.show(block=True)  # Keep the plot window open
     return
 
@@ -3,18 +3,45 @@ With this script is possible to estimate the the picking pose of target point.
 
 """
 import cv2
+import functools
 import zivid
 from pathlib import Path
-from typing import Tuple
+from typing import Optional, Tuple
+import numba
 import numpy as np
 from nptyping import Floating, NDArray, Shape
 import open3d as o3d
 
 
+def _finite_points_and_colors(
+    xyz: np.ndarray[Shape["*, *, 3"], Floating], rgba: np.ndarray[Shape["*, *, 3"], Floating]
+) -> Tuple[np.ndarray[Shape["*, 3"], Floating], np.ndarray[Shape["*, 3"], Floating]]:
+    """Gather the finite points and their colors in a single pass.
+
+    Args:
+        xyz: A numpy array of X, Y and Z point cloud coordinates
+        rgba: A numpy array with RGBA values of a 2D image
+
+    Returns:
+        xyz_valid: A numpy array of finite X, Y and Z coordinates
+        rgb_valid: A float32 numpy array of RGB colors in range [0, 1] for the finite points
+
+    """
+    valid = np.isfinite(xyz).all(axis=2)
+    xyz_valid = xyz[valid]
+    # float32 is plenty for display colors and halves the bandwidth of float64
+    rgb_valid = np.empty((xyz_valid.shape[0], 3), dtype=np.float32)
+    np.multiply(rgba[..., :3][valid], np.float32(1.0 / 255.0), out=rgb_valid)
+
+    return xyz_valid, rgb_valid
+
+
 def _create_open3d_point_cloud(
     xyz: np.ndarray[Shape["*, *, 3"], Floating], rgba: np.ndarray[Shape["*, *, 3"], Floating]
-) -> o3d.geometry.PointCloud:
-    """Create a point cloud in Open3D format from NumPy array.
+) -> o3d.t.geometry.PointCloud:
+    """Create a point cloud in Open3D tensor format from NumPy array.
+
+    The tensors share memory with the NumPy arrays, positions and colors are kept in float32.
 
     Args:"
         rgba: A numpy array with RGBA values of a 2D image
@@ -24,18 +51,16 @@ def _create_open3d_point_cloud(
         refined_point_cloud_open3d: Point cloud in Open3D format without Nans or non finite values
 
     """
-    xyz_reshaped = np.nan_to_num(xyz).reshape(-1, 3)
-    rgb = rgba[:, :, 0:3].reshape(-1, 3)
+    xyz_valid, rgb_valid = _finite_points_and_colors(xyz, rgba)
 
-    point_cloud_open3d = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(xyz_reshaped))
-    point_cloud_open3d.colors = o3d.utility.Vector3dVector(rgb / 255)
+    refined_point_cloud_open3d = o3d.t.geometry.PointCloud()
+    refined_point_cloud_open3d.point.positions = o3d.core.Tensor.from_numpy(xyz_valid)
+    refined_point_cloud_open3d.point.colors = o3d.core.Tensor.from_numpy(rgb_valid)
 
-    refined_point_cloud_open3d = o3d.geometry.PointCloud.remove_non_finite_points(
-        point_cloud_open3d, remove_nan=True, remove_infinite=True
-    )
     return refined_point_cloud_open3d
 
 
+@numba.njit(cache=True)
 def _get_transformation_matrix(
     u_matrix: np.ndarray[Shape["3, 3"], Floating], point: np.ndarray[Shape["3"], Floating]
 ) -> np.ndarray[Shape["4, 4"], Floating]:
@@ -50,19 +75,29 @@ def _get_transformation_matrix(
         transformation_matrix: A numpy array with a 4x4 transformation matrix
 
     """
-    unit_vector = u_matrix[:3,2]
-    transform = np.identity(4)
-    unit_x = np.array((1,0,0))
-    y_axis = np.cross(unit_x,-unit_vector)
-    x_axis = np.cross(y_axis,unit_vector)
-    transform[:3,0] = x_axis
-    transform[:3,1] = y_axis
-    transform[:3,2] = unit_vector
-    transform[:3,3] = point
+    nx, ny, nz = u_matrix[0, 2], u_matrix[1, 2], u_matrix[2, 2]
+    # y_axis = cross((1, 0, 0), -unit_vector)
+    yx, yy, yz = 0.0, nz, -ny
+    transform = np.zeros((4, 4))
+    # x_axis = cross(y_axis, unit_vector)
+    transform[0, 0] = yy * nz - yz * ny
+    transform[1, 0] = yz * nx - yx * nz
+    transform[2, 0] = yx * ny - yy * nx
+    transform[0, 1] = yx
+    transform[1, 1] = yy
+    transform[2, 1] = yz
+    transform[0, 2] = nx
+    transform[1, 2] = ny
+    transform[2, 2] = nz
+    transform[0, 3] = point[0]
+    transform[1, 3] = point[1]
+    transform[2, 3] = point[2]
+    transform[3, 3] = 1.0
 
     return transform
 
 
+@numba.njit(cache=True)
 def _get_z_rotation_matrix(theta):
     """create a 4x4 transformation matrix that is a rotation over z-axis for a given angle
 
@@ -73,12 +108,42 @@ def _get_z_rotation_matrix(theta):
         rotation: A numpy array with a 4x4 transformation matrix
 
     """
-    rotation = np.array(
-        [[np.cos(theta), -np.sin(theta), 0, 0], [np.sin(theta), np.cos(theta), 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]]
-    )
+    cos_theta = np.cos(theta)
+    sin_theta = np.sin(theta)
+    rotation = np.zeros((4, 4))
+    rotation[0, 0] = cos_theta
+    rotation[0, 1] = -sin_theta
+    rotation[1, 0] = sin_theta
+    rotation[1, 1] = cos_theta
+    rotation[2, 2] = 1.0
+    rotation[3, 3] = 1.0
     return rotation
 
 
+@numba.njit(parallel=True, cache=True)
+def _get_poses_rotated_about_z(
+    u_matrix: np.ndarray[Shape["3, 3"], Floating],
+    point: np.ndarray[Shape["3"], Floating],
+    z_rotations: np.ndarray[Shape["*"], Floating],
+) -> np.ndarray[Shape["*, 4, 4"], Floating]:
+    """create the poses of a coordinate frame on a point for a batch of rotations over its z-axis
+
+    Args:
+        u_matrix: [3,3] numpy array with U matrix
+        point: A numpy array with a point with the translate information
+        z_rotations: A numpy array of angles that define rotations on Z-axis in radians
+
+    Returns:
+        poses: A numpy array with one 4x4 transformation matrix per angle
+
+    """
+    transform = _get_transformation_matrix(u_matrix, point)
+    poses = np.empty((z_rotations.shape[0], 4, 4))
+    for i in numba.prange(z_rotations.shape[0]):
+        poses[i] = transform @ _get_z_rotation_matrix(z_rotations[i])
+    return poses
+
+
 def _display_point_cloud(
     xyz: np.ndarray[Shape["*, *, 3"], Floating], rgba: np.ndarray[Shape["*, *, 3"], Floating]
 ) -> None:
@@ -89,15 +154,12 @@ def _display_point_cloud(
         xyz: A numpy array of X, Y and Z point cloud coordinates
 
     """
-    xyz_reshaped = np.nan_to_num(xyz).reshape(-1, 3)
-    rgb = rgba[:, :, 0:3].reshape(-1, 3)
-
-    point_cloud_open3d = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(xyz_reshaped))
-    point_cloud_open3d.colors = o3d.utility.Vector3dVector(rgb / 255)
+    point_cloud_open3d = _create_open3d_point_cloud(xyz, rgba)
 
     visualizer = o3d.visualization.Visualizer()
     visualizer.create_window()
-    visualizer.add_geometry(point_cloud_open3d)
+    # The legacy visualizer only accepts legacy geometry
+    visualizer.add_geometry(point_cloud_open3d.to_legacy())
 
     visualizer.get_render_option().point_size = 1
     visualizer.get_render_option().show_coordinate_frame = True
@@ -188,11 +250,27 @@ def _display_point_cloud_with_coordinate_frame_on_two_points(
 
     return pose
 
+@functools.lru_cache(maxsize=4)
+def _roi_buffer(shape: Tuple[int, ...], dtype: np.dtype) -> np.ndarray:
+    """Get a buffer for _roi_between_two_spheres, allocated once per shape and dtype.
+
+    Args:
+        shape: Shape of the buffer
+        dtype: Data type of the buffer
+
+    Returns:
+        buffer: An uninitialized numpy array
+
+    """
+    return np.empty(shape, dtype)
+
+
 def _roi_between_two_spheres(
     xyz: np.ndarray[Shape["*, *, 3"], Floating],
     centroid: np.ndarray[Shape["3"], Floating],
     inner_radius_threshold: int,
     outer_radius_threshold: int,
+    out: Optional[np.ndarray[Shape["*, *, 3"], Floating]] = None,
 ) -> np.ndarray[Shape["*, *, 3"], Floating]:
     """Filters out the data outside the region of interest defined by the checkerboard centroid.
 
@@ -201,37 +279,50 @@ def _roi_between_two_spheres(
         centroid: A numpy array of X, Y and Z central point
         inner_radius_threshold: An interger that defines the radius of the inner sphere
         outer_radius_threshold: An interger that defines the radius of the outer sphere
+        out: Optional array with the shape and dtype of xyz to write the result to, must not be xyz.
+            If None, a buffer cached per shape is reused, so the result is overwritten by the next call
 
     Returns:
         xyz: A numpy array of X, Y and Z point cloud coordinates within the region of interest
 
     """
-    xyz_filtered = xyz.copy()
-    radius = np.linalg.norm(centroid - xyz_filtered, axis=2)
-    xyz_filtered[radius < inner_radius_threshold] = np.nan
-    xyz_filtered[radius > outer_radius_threshold] = np.nan
+    if out is None:
+        out = _roi_buffer(xyz.shape, xyz.dtype)
+    # out holds the offsets to the centroid first, then the filtered points
+    np.subtract(xyz, centroid, out=out)
+    # Compare squared distances, no square root needed
+    squared_radius = np.einsum("...i,...i->...", out, out)
+    outside = (squared_radius < inner_radius_threshold**2) | (squared_radius > outer_radius_threshold**2)
+    np.copyto(out, xyz)
+    out[outside] = np.nan
 
-    return xyz_filtered
+    return out
 
 
 def _plane_fit(
     points: NDArray[Shape["*, *, 3"], Floating]
 ) -> Tuple[NDArray[Shape["3, 3"], Floating], float, NDArray[Shape["3"], Floating]]:
-    """plane fitting with Singular Value Decomposition.
+    """plane fitting with eigen decomposition of the points covariance.
 
     Args:
         points: points that lie in the plane
 
     Returns:
-        u_matrix: NDArray[3,3] U matrix of SVD, singular value decomposition
+        u_matrix: NDArray[3,3] eigenvectors sorted by descending eigenvalue (same as U matrix of SVD),
+            the last column is the plane normal
         point_in_plane: NDArray[3] point_in_plane
 
     """
-    points_no_nan = points[~np.isnan(points).any(axis=2)]
-    point_in_plane = points_no_nan.mean(axis=0)
-    distance_to_mean_point = points_no_nan - point_in_plane[np.newaxis, :]
-    M = np.dot(distance_to_mean_point.T, distance_to_mean_point)
-    u = np.linalg.svd(M)[0]
+    # Invalid points are NaN in all of X, Y and Z, checking X is enough.
+    # Zivid points are float32, the per-point work stays in float32 to halve memory traffic.
+    points_no_nan = points[~np.isnan(points[..., 0])].astype(np.float32, copy=False)
+    point_in_plane = points_no_nan.mean(axis=0, dtype=np.float64)
+    # Center before the products, sum(p p^T) - n mean mean^T cancels badly in float32.
+    # Only the 3x3 sums are accumulated in float64.
+    distance_to_mean_point = points_no_nan - point_in_plane.astype(np.float32)
+    M = np.einsum("ni,nj->ij", distance_to_mean_point, distance_to_mean_point, dtype=np.float64)
+    # M is symmetric, eigh returns ascending eigenvalues
+    u = np.linalg.eigh(M)[1][:, ::-1]
     return (u, point_in_plane)
 
 
@@ -269,7 +360,8 @@ def main():
         print(f"\nPlane U matrix = \n{u_matrix}\nZ vector = \n{u_matrix[:,2]}\nA point in plane = {point_in_plane}")
         
         # drawing a coordinate frame on the point cloud and inspecting it
-        open3d_point_cloud = _create_open3d_point_cloud(xyz, rgba) # you can change "xyz" or "mask_region"
+        # Converted to legacy format once, both displays below reuse it
+        open3d_point_cloud = _create_open3d_point_cloud(xyz, rgba).to_legacy() # you can change "xyz" or "mask_region"
         picking_pose = _display_point_cloud_with_coordinate_frame_on_a_point(
             point_cloud_open3d=open3d_point_cloud,
             u_matrix=u_matrix,
@@ -289,8 +381,10 @@ def main():
         # find vx[2] values using vx and vz is perpendicular!
         vx[2] = -(vx[0]*vz[0]+vx[1]*vz[1])/vz[2]
         vx = vx / np.linalg.norm(vx) 
-        # find vy using vector cross
-        vy = np.cross(vx, vz)
+        # find vy using vector cross, written out since np.cross has large overhead on 3-vectors
+        vy = np.array(
+            [vx[1] * vz[2] - vx[2] * vz[1], vx[2] * vz[0] - vx[0] * vz[2], vx[0] * vz[1] - vx[1] * vz[0]]
+        )
         vy = vy / np.linalg.norm(vy)
         
         u_matrix_modified = np.array([[1, 0, 0], [0, 1, 0], [0, 0, 0]], Floating)
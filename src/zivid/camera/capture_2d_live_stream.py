@@ -5,6 +5,9 @@ from datetime import timedelta
 import zivid
 import cv2
 
+DISPLAY_SIZE = (972, 600)  # half of 1944 x 1200
+
+
 def _set_sampling_pixel(settings: zivid.Settings, camera: zivid.Camera) -> None:
     """Get sampling pixel setting based on the camera model.
 
@@ -71,14 +74,20 @@ def _main() -> None:
     settings.color = settings_2d
     _set_sampling_pixel(settings, camera)
 
+    # settings is complete here and is not modified inside the capture loop. The Zivid SDK has no
+    # API to upload settings once and capture without them, so the same object is passed each time.
     print("Capturing 2D frame")
     print("Getting RGBA image")
+    # Display image is allocated once and reused by resize every frame
+    dst = cv2.UMat(DISPLAY_SIZE[1], DISPLAY_SIZE[0], cv2.CV_8UC4)
     while True: 
         with  camera.capture_2d(settings) as frame_2d:
             # image_srgb = frame_2d.image_rgba_srgb() # this is rgba, we need bgr.
             # bgr = cv2.cvtColor(rgba, cv2.COLOR_RGBA2BGR)
-            bgr = frame_2d.image_bgra_srgb().copy_data()
-            dst = cv2.resize(bgr, dsize=(972, 600), interpolation=cv2.INTER_AREA) # 1944 x 1200
+            # imshow ignores the alpha channel, so BGRA is displayed without cvtColor.
+            # UMat lets OpenCV run resize on OpenCL when available.
+            bgra = cv2.UMat(frame_2d.image_bgra_srgb().copy_data())
+            cv2.resize(bgra, dsize=DISPLAY_SIZE, dst=dst, interpolation=cv2.INTER_AREA)
 
             cv2.imshow('Live-Stream',dst)
             if cv2.waitKey(20) & 0xFF == 27:
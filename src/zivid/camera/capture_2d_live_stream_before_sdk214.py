@@ -5,6 +5,9 @@ import datetime
 import zivid
 import cv2
 
+DISPLAY_SIZE = (972, 600)  # half of 1944 x 1200
+
+
 def _main() -> None:
     app = zivid.Application()
 
@@ -31,13 +34,18 @@ def _main() -> None:
 
     print("Capturing 2D frame")
     print("Getting RGBA image")
+    # Display images are allocated once and reused by resize and cvtColor every frame
+    resized = cv2.UMat(DISPLAY_SIZE[1], DISPLAY_SIZE[0], cv2.CV_8UC4)
+    dst = cv2.UMat(DISPLAY_SIZE[1], DISPLAY_SIZE[0], cv2.CV_8UC3)
     while True: 
         with camera.capture(settings_2d) as frame_2d:
             image = frame_2d.image_rgba()
             rgba = image.copy_data()
 
-            bgr = cv2.cvtColor(rgba, cv2.COLOR_RGBA2BGR)
-            dst = cv2.resize(bgr, dsize=(972, 600), interpolation=cv2.INTER_AREA) # 1944 x 1200
+            # Resize first so the color conversion runs on the smaller image.
+            # UMat lets OpenCV run both steps on OpenCL when available.
+            cv2.resize(cv2.UMat(rgba), dsize=DISPLAY_SIZE, dst=resized, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(resized, cv2.COLOR_RGBA2BGR, dst=dst)
 
             cv2.imshow('Live-Stream',dst)
             if cv2.waitKey(20) & 0xFF == 27:
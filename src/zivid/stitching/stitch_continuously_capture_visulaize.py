@@ -9,6 +9,9 @@ Note: This example uses experimental SDK features, which may be modified, moved,
 """
 
 import argparse
+import queue
+import sys
+import threading
 import time
 from pathlib import Path
 
@@ -20,8 +23,11 @@ from zivid.experimental.toolbox.point_cloud_registration import (
     LocalPointCloudRegistrationParameters,
     local_point_cloud_registration,
 )
-from zividsamples.display import display_pointcloud
-import open3d as o3d
+from zividsamples.display import show_pointcloud_open3d
+
+REGISTRATION_VOXEL_SIZE = 1.5  # mm, voxel size of the stitched cloud used as registration target
+NUMBER_OF_CAPTURES = 20
+DISPLAY_INTERVAL = 5  # captures between viewer refreshes, the final result is always shown
 
 
 def _options() -> argparse.Namespace:
@@ -43,29 +49,89 @@ def _options() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def show_pointcloud_open3d(xyz, rgb, vis=None, pcd=None):  # type: ignore
-    # xyz: (N, 3), rgb: (N, 3)
-    if pcd is None:
-        pcd = o3d.geometry.PointCloud()
-        pcd.points = o3d.utility.Vector3dVector(xyz)
-        pcd.colors = o3d.utility.Vector3dVector(rgb / 255.0)
-        vis = o3d.visualization.Visualizer()
-        vis.create_window(window_name="Stitching", width=1920, height=1080)
-        vis.add_geometry(pcd)
-        # 배경색을 어두운 회색으로 설정
-        render_option = vis.get_render_option()
-        render_option.background_color = [0.1, 0.1, 0.1]
-        vis.poll_events()
-        vis.update_renderer()
-        return vis, pcd
-    else:
-        assert vis is not None
-        pcd.points = o3d.utility.Vector3dVector(xyz)
-        pcd.colors = o3d.utility.Vector3dVector(rgb / 255.0)
-        vis.update_geometry(pcd)
-        vis.poll_events()
-        vis.update_renderer()
-        return vis, pcd
+def _inverse_rigid_transform(transform: np.ndarray) -> np.ndarray:
+    """Invert a rigid 4x4 transformation matrix without a general matrix inverse.
+
+    Args:
+        transform: 4x4 transformation matrix [R|t; 0 1] with R a rotation matrix
+
+    Returns:
+        Inverse transformation matrix [R^T|-R^T t; 0 1]
+
+    """
+    rotation_transposed = transform[:3, :3].T
+    inverse = np.eye(4)
+    inverse[:3, :3] = rotation_transposed
+    inverse[:3, 3] = -rotation_transposed @ transform[:3, 3]
+    return inverse
+
+
+class _PointCloudViewer:
+    """Open3D window that is updated from a background thread.
+
+    The capture loop only hands over the newest point cloud and never waits for rendering. Clouds that
+    are not displayed before a newer one arrives are dropped. Open3D windows must be driven from the main
+    thread on macOS, there the window is updated synchronously instead.
+
+    """
+
+    def __init__(self) -> None:
+        self._vis = None
+        self._pcd = None
+        self._threaded = sys.platform != "darwin"
+        self._clouds: queue.Queue = queue.Queue(maxsize=1)
+        self._done = threading.Event()
+        if self._threaded:
+            self._thread = threading.Thread(target=self._render_loop, daemon=True)
+            self._thread.start()
+
+    def update(self, xyz: np.ndarray, rgb: np.ndarray) -> None:
+        """Show a new point cloud, replacing the previous one.
+
+        Args:
+            xyz: A numpy array of X, Y and Z point cloud coordinates (N, 3)
+            rgb: A numpy array of RGB colors (N, 3)
+
+        """
+        if not self._threaded:
+            self._vis, self._pcd = show_pointcloud_open3d(xyz, rgb, self._vis, self._pcd)
+            return
+        try:
+            self._clouds.put_nowait((xyz, rgb))
+        except queue.Full:
+            # Drop the cloud that was not rendered yet, this is the only producer so the put succeeds
+            try:
+                self._clouds.get_nowait()
+            except queue.Empty:
+                pass
+            self._clouds.put_nowait((xyz, rgb))
+
+    def close(self) -> None:
+        """Show the last point cloud until the user closes the window."""
+        if self._threaded:
+            self._done.set()
+            self._thread.join()
+        else:
+            self._show_until_closed()
+
+    def _render_loop(self) -> None:
+        while True:
+            try:
+                xyz, rgb = self._clouds.get(timeout=0.05)
+            except queue.Empty:
+                if self._done.is_set():
+                    break
+                if self._vis is not None:
+                    self._vis.poll_events()
+                    self._vis.update_renderer()
+                continue
+            self._vis, self._pcd = show_pointcloud_open3d(xyz, rgb, self._vis, self._pcd)
+        self._show_until_closed()
+
+    def _show_until_closed(self) -> None:
+        if self._vis is not None:
+            self._vis.run()
+            self._vis.destroy_window()
 
 
 def _main() -> None:
@@ -88,13 +154,15 @@ def _main() -> None:
 
     # DOCTAG-START-STITCH-ROTATING-OBJECT-CAPTURE-AND-STITCH
     previous_to_current_point_cloud_transform = np.eye(4)
+    transform_before_previous = None
+    # previous_to_current_point_cloud_transform 이 직전 캡처에서 수렴한 registration 결과인지 여부
+    have_previous_delta = False
     unorganized_stitched_point_cloud = zivid.UnorganizedPointCloud()
     registration_params = LocalPointCloudRegistrationParameters()
 
-    vis = None
-    pcd = None
+    viewer = _PointCloudViewer()
 
-    for number_of_captures in range(20):
+    for number_of_captures in range(NUMBER_OF_CAPTURES):
         time.sleep(0.1)
         frame = camera.capture_2d_3d(settings)
         unorganized_point_cloud = (
@@ -102,26 +170,45 @@ def _main() -> None:
         )
 
         if number_of_captures != 0:
+            # 이전 두 번의 변화량으로 다음 변화량을 외삽해서 초기값으로 사용 (회전 속도 변화 반영)
+            # 처음 두 번은 직전 변화량 그대로 사용
+            initial_transform = previous_to_current_point_cloud_transform
+            if transform_before_previous is not None:
+                initial_transform = previous_to_current_point_cloud_transform @ (
+                    _inverse_rigid_transform(transform_before_previous) @ previous_to_current_point_cloud_transform
+                )
             local_point_cloud_registration_result = local_point_cloud_registration(
-                target=unorganized_stitched_point_cloud,
+                target=registration_target,
                 source=unorganized_point_cloud,
                 parameters=registration_params,
-                initial_transform=previous_to_current_point_cloud_transform,
+                initial_transform=initial_transform,
             )
             if not local_point_cloud_registration_result.converged():
                 print("Registration did not converge...")
+                # 건너뛴 캡처 때문에 연속된 변화량이 아니므로 외삽하지 않는다
+                have_previous_delta = False
+                transform_before_previous = None
                 continue
+            transform_before_previous = previous_to_current_point_cloud_transform if have_previous_delta else None
             previous_to_current_point_cloud_transform = local_point_cloud_registration_result.transform().to_matrix()
+            have_previous_delta = True
 
-            unorganized_stitched_point_cloud.transform(np.linalg.inv(previous_to_current_point_cloud_transform))
+            unorganized_stitched_point_cloud.transform(
+                _inverse_rigid_transform(previous_to_current_point_cloud_transform)
+            )
         unorganized_stitched_point_cloud.extend(unorganized_point_cloud)
+        # Register against a coarser copy, the dense stitched cloud is only kept for display and export
+        registration_target = unorganized_stitched_point_cloud.voxel_downsampled(
+            voxel_size=REGISTRATION_VOXEL_SIZE, min_points_per_voxel=2
+        )
 
         print(f"Captures done: {number_of_captures}")
 
-        # open3d로 실시간 포인트 클라우드 업데이트
-        xyz = unorganized_stitched_point_cloud.copy_data("xyz")
-        rgb = unorganized_stitched_point_cloud.copy_data("rgba")[:, 0:3]
-        vis, pcd = show_pointcloud_open3d(xyz, rgb, vis, pcd)
+        # open3d로 포인트 클라우드 업데이트 (DISPLAY_INTERVAL 마다, 전체 클라우드 복사를 줄이기 위해)
+        if (number_of_captures + 1) % DISPLAY_INTERVAL == 0:
+            xyz = unorganized_stitched_point_cloud.copy_data("xyz")
+            rgb = unorganized_stitched_point_cloud.copy_data("rgba")[:, 0:3]
+            viewer.update(xyz, rgb)
 
     print("Voxel-downsampling the stitched point cloud")
     unorganized_stitched_point_cloud = unorganized_stitched_point_cloud.voxel_downsampled(
@@ -131,12 +218,10 @@ def _main() -> None:
     # 마지막 결과도 open3d로 갱신
     xyz = unorganized_stitched_point_cloud.copy_data("xyz")
     rgb = unorganized_stitched_point_cloud.copy_data("rgba")[:, 0:3] 
-    vis, pcd = show_pointcloud_open3d(xyz, rgb, vis, pcd)
+    viewer.update(xyz, rgb)
 
-    # 창을 닫으려면 아래 코드 사용
-    if vis is not None:
-        vis.run()
-        vis.destroy_window()
+    # 창을 닫을 때까지 대기
+    viewer.close()
 
     file_name = Path(__file__).parent / "StitchedPointCloudOfRotatingObject.ply"
     export_unorganized_point_cloud(unorganized_stitched_point_cloud, PLY(str(file_name), layout=PLY.Layout.unordered))
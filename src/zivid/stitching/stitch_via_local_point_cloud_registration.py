@@ -41,13 +41,27 @@ def _main() -> None:
     # DOCTAG-END-STITCH-2-POINT-CLOUDS-LOAD-AND-CONVERT-TO-UPC
 
     # DOCTAG-START-STITCH-2-POINT-CLOUDS-FIND-TRANSFORMATION-AND-STITCH
-    print("Estimating transformation between point clouds")
+    print("Estimating transformation between point clouds (coarse to fine)")
+    coarse_point_cloud_1 = unorganized_point_cloud_1.voxel_downsampled(voxel_size=3.0, min_points_per_voxel=5)
+    coarse_point_cloud_2 = unorganized_point_cloud_2.voxel_downsampled(voxel_size=3.0, min_points_per_voxel=5)
+    coarse_registration_params = LocalPointCloudRegistrationParameters()
+    coarse_registration_params.max_correspondence_distance = 10
+    print(f"Using coarse Local Point Cloud Registration parameters: {coarse_registration_params}")
+    coarse_registration_result = local_point_cloud_registration(
+        target=coarse_point_cloud_1, source=coarse_point_cloud_2, parameters=coarse_registration_params
+    )
+    assert coarse_registration_result.converged(), "Coarse registration did not converge..."
+
     unorganized_point_cloud_1_lpcr = unorganized_point_cloud_1.voxel_downsampled(voxel_size=1.0, min_points_per_voxel=3)
     unorganized_point_cloud_2_lpcr = unorganized_point_cloud_2.voxel_downsampled(voxel_size=1.0, min_points_per_voxel=3)
     registration_params = LocalPointCloudRegistrationParameters()
-    print(f"Using Local Point Cloud Registration parameters: {registration_params}")
+    registration_params.max_correspondence_distance = 3
+    print(f"Using fine Local Point Cloud Registration parameters: {registration_params}")
     local_point_cloud_registration_result = local_point_cloud_registration(
-        target=unorganized_point_cloud_1_lpcr, source=unorganized_point_cloud_2_lpcr, parameters=registration_params
+        target=unorganized_point_cloud_1_lpcr,
+        source=unorganized_point_cloud_2_lpcr,
+        parameters=registration_params,
+        initial_transform=coarse_registration_result.transform().to_matrix(),
     )
     assert local_point_cloud_registration_result.converged(), "Registration did not converge..."
     point_cloud_1_to_point_cloud_2_transform = local_point_cloud_registration_result.transform()
@@ -55,10 +69,8 @@ def _main() -> None:
     print("Displaying point clouds after stitching")
     final_point_cloud = zivid.UnorganizedPointCloud()
     final_point_cloud.extend(unorganized_point_cloud_1)
-    unorganized_point_cloud_2_transformed = unorganized_point_cloud_2.transformed(
-        point_cloud_1_to_point_cloud_2_transform.to_matrix()
-    )
-    final_point_cloud.extend(unorganized_point_cloud_2_transformed)
+    unorganized_point_cloud_2.transform(point_cloud_1_to_point_cloud_2_transform.to_matrix())
+    final_point_cloud.extend(unorganized_point_cloud_2)
     display_pointcloud(
         xyz=final_point_cloud.copy_data("xyz"),
         rgb=final_point_cloud.copy_data("rgba")[:, 0:3],
@@ -8,21 +8,48 @@ Note: This example uses experimental SDK features, which may be modified, moved,
 
 """
 
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import zivid
 from zivid.experimental.toolbox.point_cloud_registration import (
     LocalPointCloudRegistrationParameters,
     local_point_cloud_registration,
 )
-from zividsamples.display import display_pointcloud
+from zividsamples.display import show_pointcloud_open3d
 from zividsamples.paths import get_sample_data_path
 from pathlib import Path
 from zivid.experimental.point_cloud_export import export_unorganized_point_cloud
 from zivid.experimental.point_cloud_export.file_format import PLY
 
 
+def _options() -> argparse.Namespace:
+    """Function to read user arguments.
+
+    Returns:
+        Arguments from user
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Display the point clouds before stitching and every pairwise registration result",
+    )
+
+    return parser.parse_args()
+
+
 def _main() -> None:
+    user_options = _options()
+
     zivid.Application()
 
+    # 모든 결과를 같은 Open3D 창에 갱신, 각 결과마다 N 키를 누를 때까지 대기
+    vis, pcd = None, None
+
     # 파일 경로 리스트 생성
     base_dir = Path("C:/Zivid/python-test/stitching/shoes_02")  
     file_names = [f"0{i}.zdf" for i in range(1, 6)]
@@ -31,88 +58,89 @@ def _main() -> None:
     # 포인트 클라우드 변환
     unorganized_point_clouds = [f.point_cloud().to_unorganized_point_cloud() for f in frames]
 
-    # 스티칭 전 포인트 클라우드 모두 합쳐서 디스플레이
-    print("Displaying point clouds before stitching")
-    unorganized_not_stitched_point_cloud = zivid.UnorganizedPointCloud()
-    for upc in unorganized_point_clouds:
-        unorganized_not_stitched_point_cloud.extend(upc)
-    # display_pointcloud(
-    #     xyz=unorganized_not_stitched_point_cloud.copy_data("xyz"),
-    #     rgb=unorganized_not_stitched_point_cloud.copy_data("rgba")[:, 0:3],
-    # )
-
-    print("Estimating transformation and stitching point clouds (누적 방식)")
+    if user_options.debug:
+        # 스티칭 전 포인트 클라우드 모두 합쳐서 디스플레이
+        print("Displaying point clouds before stitching")
+        unorganized_not_stitched_point_cloud = zivid.UnorganizedPointCloud()
+        for upc in unorganized_point_clouds:
+            unorganized_not_stitched_point_cloud.extend(upc)
+        vis, pcd = show_pointcloud_open3d(
+            unorganized_not_stitched_point_cloud.copy_data("xyz"),
+            unorganized_not_stitched_point_cloud.copy_data("rgba")[:, 0:3],
+            vis,
+            pcd,
+            block=True,
+        )
+
+    print("Estimating transformation and stitching point clouds (pairwise 방식)")
     registration_params = LocalPointCloudRegistrationParameters()
     registration_params.max_iterations = 800
     registration_params.max_correspondence_distance = 15
 
-    # 01과 02를 먼저 스티칭
+    # 0i를 0(i-1)에 registration 하고, 변환을 누적해서 01 좌표계로 변환
+    # 누적된 결과 대신 이웃 프레임끼리만 registration 하므로 target 크기가 커지지 않는다
+    # 각 쌍은 서로 독립이므로 스레드에서 동시에 registration (SDK 는 계산 중 GIL 을 놓는다)
+    def _register_pair(pair):  # type: ignore
+        target, source = pair
+        return local_point_cloud_registration(target=target, source=source, parameters=registration_params)
+
+    pairs = list(zip(unorganized_point_clouds[:-1], unorganized_point_clouds[1:]))
+    with ThreadPoolExecutor(max_workers=len(pairs)) as executor:
+        registration_results = list(executor.map(_register_pair, pairs))
+
+    transforms_to_first = [np.eye(4)]
+    last_transform = np.eye(4)
+    for i, ((target, source), local_point_cloud_registration_result) in enumerate(zip(pairs, registration_results), 1):
+        if local_point_cloud_registration_result.converged():
+            transform = local_point_cloud_registration_result.transform().to_matrix()
+            last_transform = transform
+        else:
+            # 한 프레임 실패로 전체 스티칭을 버리지 않도록, 직전 쌍의 변환(일정한 움직임 가정)으로 대체
+            print(f"Warning: Registration for 0{i+1}.zdf 실패, 직전 변환을 대신 사용")
+            transform = last_transform
+        print(f"Transform matrix for 0{i+1}.zdf -> 0{i}.zdf:\n{transform}")
+        transforms_to_first.append(transforms_to_first[-1] @ transform)
+
+        if user_options.debug:
+            # 중간 결과 시각화
+            pair_point_cloud = zivid.UnorganizedPointCloud()
+            pair_point_cloud.extend(target)
+            pair_point_cloud.extend(source.transformed(transform))
+            vis, pcd = show_pointcloud_open3d(
+                pair_point_cloud.copy_data("xyz"), pair_point_cloud.copy_data("rgba")[:, 0:3], vis, pcd, block=True
+            )
+
+    # 모든 포인트 클라우드를 한 번씩만 변환해서 합치기 (in-place 변환, 복사본을 만들지 않음)
     stitched_point_cloud = zivid.UnorganizedPointCloud()
-    stitched_point_cloud.extend(unorganized_point_clouds[0])
-    # registration은 원본으로 수행
-    target_lpcr = unorganized_point_clouds[0]
-    source = unorganized_point_clouds[1]
-    source_lpcr = source
-    local_point_cloud_registration_result = local_point_cloud_registration(
-        target=target_lpcr, source=source_lpcr, parameters=registration_params
-    )
-    assert local_point_cloud_registration_result.converged(), "Registration for 02.zdf 실패"
-    transform = local_point_cloud_registration_result.transform().to_matrix()
-    source_transformed = source.transformed(transform)
-    stitched_point_cloud.extend(source_transformed)
-    print("Stitched 01.zdf with 02.zdf")
-    # 다운샘플링 적용 (합친 후)
-    stitched_point_cloud = stitched_point_cloud.voxel_downsampled(voxel_size=1.0, min_points_per_voxel=1)
-    # 중간 결과 시각화
-    display_pointcloud(
-        xyz=stitched_point_cloud.copy_data("xyz"),
-        rgb=stitched_point_cloud.copy_data("rgba")[:, 0:3],
-    )
+    for unorganized_point_cloud, transform in zip(unorganized_point_clouds, transforms_to_first):
+        unorganized_point_cloud.transform(transform)
+        stitched_point_cloud.extend(unorganized_point_cloud)
+    print(f"Stitched 01~0{len(unorganized_point_clouds)}.zdf")
 
-    # 이후 03, 04, 05를 누적된 결과와 계속 스티칭
-    for i in range(2, 5):
-        # registration은 다운샘플링 없이 누적 결과와 원본 source로 수행
-        target_lpcr = stitched_point_cloud
-        source = unorganized_point_clouds[i]
-        source_lpcr = source
-        local_point_cloud_registration_result = local_point_cloud_registration(
-            target=target_lpcr, source=source_lpcr, parameters=registration_params
-        )
-        assert local_point_cloud_registration_result.converged(), f"Registration for 0{i+1}.zdf 실패"
-        transform = local_point_cloud_registration_result.transform().to_matrix()
-        print(f"Transform matrix for 0{i+1}.zdf:\n{transform}")
-        source_transformed = source.transformed(transform)
-        stitched_point_cloud.extend(source_transformed)
-        print(f"Stitched 01~0{i}.zdf with 0{i+1}.zdf")
-        # 다운샘플링 적용 (합친 후)
-        stitched_point_cloud = stitched_point_cloud.voxel_downsampled(voxel_size=1.0, min_points_per_voxel=1)
-        # 중간 결과 시각화
-        display_pointcloud(
-            xyz=stitched_point_cloud.copy_data("xyz"),
-            rgb=stitched_point_cloud.copy_data("rgba")[:, 0:3],
-        )
+    # 디스플레이와 포인트 개수 출력에 같은 복사본을 재사용 (copy_data 는 호출할 때마다 전체 복사)
+    stitched_xyz = stitched_point_cloud.copy_data("xyz")
+    stitched_rgba = stitched_point_cloud.copy_data("rgba")
 
     print("Displaying point clouds after stitching")
-    display_pointcloud(
-        xyz=stitched_point_cloud.copy_data("xyz"),
-        rgb=stitched_point_cloud.copy_data("rgba")[:, 0:3],
-    )
+    vis, pcd = show_pointcloud_open3d(stitched_xyz, stitched_rgba[:, 0:3], vis, pcd, block=True)
 
     print("Voxel-downsampling the stitched point cloud")
     final_point_cloud = stitched_point_cloud.voxel_downsampled(voxel_size=0.5, min_points_per_voxel=1)
-    display_pointcloud(
-        xyz=final_point_cloud.copy_data("xyz"),
-        rgb=final_point_cloud.copy_data("rgba")[:, 0:3],
-    )
+    final_xyz = final_point_cloud.copy_data("xyz")
+    final_rgba = final_point_cloud.copy_data("rgba")
+    vis, pcd = show_pointcloud_open3d(final_xyz, final_rgba[:, 0:3], vis, pcd, block=True)
 
     print("01.zdf point count:", unorganized_point_clouds[0].copy_data("xyz").shape[0])
-    print("stitched point count:", stitched_point_cloud.copy_data("xyz").shape[0])
-    print("final (downsampled) point count:", final_point_cloud.copy_data("xyz").shape[0])
+    print("stitched point count:", stitched_xyz.shape[0])
+    print("final (downsampled) point count:", final_xyz.shape[0])
 
     # 최종 포인트 클라우드를 ply 파일로 저장
     file_name = Path(__file__).parent / "StitchedPointCloudOfShoes.ply"
     export_unorganized_point_cloud(final_point_cloud, PLY(str(file_name), layout=PLY.Layout.unordered))
 
+    if vis is not None:
+        vis.destroy_window()
+
 
 if __name__ == "__main__":
     _main()
@@ -1,38 +1,72 @@
 import os
 import cv2
+import numba
 import numpy as np
 import open3d as o3d
 import zivid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 location_dir = Path.cwd()
 
+
+def load_and_detect(frame_file_path):
+    # Each frame is independent, so this runs on a worker thread (the SDK releases the GIL while loading/detecting)
+    print(f"Detect feature points from {frame_file_path.name}")
+    frame = zivid.Frame(frame_file_path)
+    detection_result = zivid.calibration.detect_feature_points(frame.point_cloud())
+
+    if not detection_result.valid():
+        raise RuntimeError(f"Failed to detect feature points from frame {frame_file_path}")
+
+    return detection_result
+
+
+@numba.njit(parallel=True, cache=True)
+def transform_finite_points(xyz, rgba, transform, out_xyz, out_rgb, out_finite):
+    # One pass per camera: finite check, R @ p + t and the RGB copy, written straight into the output slices
+    # No fastmath, it lets LLVM assume there are no NaNs and drop the isfinite checks
+    for i in numba.prange(xyz.shape[0]):
+        x = xyz[i, 0]
+        y = xyz[i, 1]
+        z = xyz[i, 2]
+        if not (np.isfinite(x) and np.isfinite(y) and np.isfinite(z)):
+            out_finite[i] = False
+            continue
+        out_xyz[i, 0] = transform[0, 0] * x + transform[0, 1] * y + transform[0, 2] * z + transform[0, 3]
+        out_xyz[i, 1] = transform[1, 0] * x + transform[1, 1] * y + transform[1, 2] * z + transform[1, 3]
+        out_xyz[i, 2] = transform[2, 0] * x + transform[2, 1] * y + transform[2, 2] * z + transform[2, 3]
+        out_rgb[i, 0] = rgba[i, 0]
+        out_rgb[i, 1] = rgba[i, 1]
+        out_rgb[i, 2] = rgba[i, 2]
+        out_finite[i] = True
+
+
+def load_for_stitching(frame_file_path):
+    print(f"Stitching point cloud from {frame_file_path.name}")
+    frame = zivid.Frame(frame_file_path)
+    # The frame is returned as well so it outlives its point cloud
+    return frame, frame.point_cloud()
+
+
 def main() -> None:
     with zivid.Application():
         # imgXX.zdf : point cloud for Multi camera calibration
         # img_test_XX.zdf : point cloud for stitching 
-        calibration_inputs = []
+        calibration_paths = []
         idata = 1
         while True:
             frame_file_path = location_dir / "zivid" / "stitching_multi_camera" / f"img{idata:02d}.zdf"
             print("Loading ZDF for Multi camera calibration : ", frame_file_path)
-            if frame_file_path.is_file():
-
-                print(f"Detect feature points from img{idata:02d}.zdf")
-                frame = zivid.Frame(frame_file_path)
-                point_cloud = frame.point_cloud()
-                detection_result = zivid.calibration.detect_feature_points(point_cloud)
-
-                if not detection_result.valid():
-                    raise RuntimeError(f"Failed to detect feature points from frame {frame_file_path}")
-
-                calibration_inputs.append(detection_result)
-
-            else:
+            if not frame_file_path.is_file():
                 break
-
+            calibration_paths.append(frame_file_path)
             idata += 1
-            
+
+        # One worker per camera, executor.map keeps the results in camera order
+        with ThreadPoolExecutor(max_workers=max(len(calibration_paths), 1)) as executor:
+            calibration_inputs = list(executor.map(load_and_detect, calibration_paths))
+
         results = zivid.calibration.calibrate_multi_camera(calibration_inputs)
 
         if results:
@@ -43,42 +77,48 @@ def main() -> None:
 
         print("End : Multi ZDF = Multi camera Calibration")
 
-        idata = 1 # reset count
-        stitched_point_cloud = o3d.geometry.PointCloud()
-        
-        # Loading zdf for stitching and Stitching!
+        # Loading zdf for stitching
+        stitching_inputs = []
         for i in range(len(transforms)):
-            frame_file_path = location_dir / "zivid" / "stitching_multi_camera" / f"img_test_{idata:02d}.zdf"
+            frame_file_path = location_dir / "zivid" / "stitching_multi_camera" / f"img_test_{i + 1:02d}.zdf"
             print("Loading ZDF for Stitching : ", frame_file_path)
             if frame_file_path.is_file():
-                print(f"Stitching point cloud from img_test_{idata:02d}.zdf")
-                frame = zivid.Frame(frame_file_path)
-                point_cloud = frame.point_cloud()
-                point_cloud.transform(transforms[i])
-                xyz = point_cloud.copy_data("xyz")
-                rgba = point_cloud.copy_data("rgba")
-
-                xyz = np.nan_to_num(xyz).reshape(-1, 3)
-                rgb = rgba[:, :, 0:3].reshape(-1, 3)
-                # Stitching
-                if i==0:
-                    stitched_xyz = xyz
-                    stitched_rgb = rgb
-                else:
-                    stitched_xyz = np.concatenate((stitched_xyz,xyz), axis=0)
-                    stitched_rgb = np.concatenate((stitched_rgb,rgb), axis=0)
-            
-            idata += 1
+                stitching_inputs.append((frame_file_path, np.asarray(transforms[i], dtype=np.float32)))
+
+        with ThreadPoolExecutor(max_workers=max(len(stitching_inputs), 1)) as executor:
+            loaded = list(executor.map(load_for_stitching, [path for path, _ in stitching_inputs]))
+        frames = [frame for frame, _ in loaded]
+        point_clouds = [point_cloud for _, point_cloud in loaded]
+
+        # Stitching! Buffers are allocated once for all cameras and filled slice by slice
+        num_points = sum(point_cloud.height * point_cloud.width for point_cloud in point_clouds)
+        stitched_xyz = np.empty((num_points, 3), dtype=np.float32)
+        stitched_rgb = np.empty((num_points, 3), dtype=np.uint8)
+        finite = np.empty(num_points, dtype=np.bool_)
+        start = 0
+        for point_cloud, (_, transform) in zip(point_clouds, stitching_inputs):
+            end = start + point_cloud.height * point_cloud.width
+            transform_finite_points(
+                point_cloud.copy_data("xyz").reshape(-1, 3),
+                point_cloud.copy_data("rgba").reshape(-1, 4),
+                transform,
+                stitched_xyz[start:end],
+                stitched_rgb[start:end],
+                finite[start:end],
+            )
+            start = end
 
-        stitched_point_cloud.points = o3d.utility.Vector3dVector(stitched_xyz)
-        stitched_point_cloud.colors = o3d.utility.Vector3dVector(stitched_rgb / 255)
-        stitched_point_cloud = o3d.geometry.PointCloud.remove_non_finite_points(
-            stitched_point_cloud, remove_nan=True, remove_infinite=True
+        # Keep only finite points, Open3D gets the already filtered data
+        # The tensor point cloud wraps the float32 arrays as they are, only the legacy viewer needs float64
+        stitched_point_cloud = o3d.t.geometry.PointCloud()
+        stitched_point_cloud.point.positions = o3d.core.Tensor.from_numpy(stitched_xyz[finite])
+        stitched_point_cloud.point.colors = o3d.core.Tensor.from_numpy(
+            np.multiply(stitched_rgb[finite], np.float32(1.0 / 255.0), dtype=np.float32)
         )
 
         visualizer = o3d.visualization.Visualizer()
         visualizer.create_window()
-        visualizer.add_geometry(stitched_point_cloud)
+        visualizer.add_geometry(stitched_point_cloud.to_legacy())
         visualizer.run()
         visualizer.destroy_window()
 